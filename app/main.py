@@ -7,16 +7,40 @@ Only the APIs required for the tag-print workflow:
   3. POST /api/traceability/supervisor-login        → VALIDATE_DEVICE_SUPERVISOR
 """
 
+import os
+from contextlib import asynccontextmanager
+
+from anyio import to_thread
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.routes.traceability_route import router as traceability_router
 from app.routes.register import router as register_router
+from app.utils.database import close_pool, init_pool
+
+# Sync route handlers (all DB-bound) run on AnyIO's worker threadpool,
+# 40 threads by default.  Make it configurable so concurrent SP calls
+# are not capped below what the DB connection pool can serve.
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "40"))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    # Warm the DB connection pool before serving traffic
+    init_pool()
+    yield
+    # Release pooled DB connections on shutdown
+    close_pool()
+
 
 app = FastAPI(
     title="Traceability Tag Print API",
     description="APIs for the Traceability Tag Print flow (Denso D-Trace)",
     version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Allow CORS for frontend / desktop app
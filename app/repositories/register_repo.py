@@ -3,50 +3,75 @@ Repository layer – calls SP [dbo].[PRC_UserSupplier_EndUser]
 for user/supervisor registration (INSERT, UPDATE, DELETE, SELECT).
 """
 
-from app.utils.database import get_db_connection
-from app.utils.password_utils import hash_password
+from threading import RLock
 
+from cachetools import TTLCache, cached
 
-def _row_to_dict(cursor, row):
-    """Convert a pyodbc Row to a plain dict using cursor.description."""
-    if row is None:
-        return None
-    columns = [col[0] for col in cursor.description]
-    return dict(zip(columns, row))
+from app.utils.database import (
+    get_db_connection,
+    prepared_cursor,
+    release_cursor,
+    transaction,
+)
+from app.utils.db_helpers import (
+    exec_sp,
+    fetch_single,
+    fetch_sp_result,
+    iter_sp_rows,
+    rows_to_list,
+)
 
 
-def _rows_to_list(cursor, rows):
-    """Convert multiple pyodbc Rows to a list of dicts."""
-    if not rows:
-        return []
-    columns = [col[0] for col in cursor.description]
-    return [dict(zip(columns, row)) for row in rows]
+# Dropdown lookups (groups / plants / packing stations) change rarely,
+# so they are served from short-lived in-process caches.
+_lookup_lock = RLock()
+_groups_cache = TTLCache(maxsize=1, ttl=300)
+_plants_cache = TTLCache(maxsize=128, ttl=60)
+_stations_cache = TTLCache(maxsize=512, ttl=60)
+# Full user list per creator (admin listing); cleared on every user write.
+_users_cache = TTLCache(maxsize=256, ttl=60)
 
 
-def _fetch_sp_result(cursor):
+def invalidate_lookup_caches():
     """
-    After executing an SP that does INSERT/UPDATE/DELETE followed by
-    SELECT 'Y' AS RESULT, pyodbc may see the DML row-count as the
-    first result-set. Skip forward with nextset() until we find a
-    result-set that has rows (cursor.description is not None).
+    Drop cached groups / plants / stations and user lists.  Called
+    after every user insert / update / delete (the plant and station
+    lists may depend on existing assignments) and after master-data
+    changes.
     """
-    while True:
-        if cursor.description is not None:
-            row = cursor.fetchone()
-            if row is not None:
-                return _row_to_dict(cursor, row)
-        if not cursor.nextset():
-            break
-    return None
+    with _lookup_lock:
+        _groups_cache.clear()
+        _plants_cache.clear()
+        _stations_cache.clear()
+        _users_cache.clear()
+
+
+def _exec_user_sp(conn, sp_type: str, **params):
+    """EXEC [dbo].[PRC_UserSupplier_EndUser] via the shared parameterized dispatcher."""
+    return exec_sp(conn, "[dbo].[PRC_UserSupplier_EndUser]", sp_type, **params)
 
 
 # ─────────────────────────────────────────────────────────────────
 # 1.  INSERT – Register a new user or supervisor
 # ─────────────────────────────────────────────────────────────────
+_SQL_PATCH_NEW_USER = """
+    UPDATE TM_Supplier_End_User
+       SET SupplierCode = ?,
+           EmailId      = ?
+     WHERE UserID = ?
+"""
+
+_SQL_PATCH_SUPPLIER_CODE = """
+    UPDATE TM_Supplier_End_User
+       SET SupplierCode = ?
+     WHERE UserID = ?
+"""
+
+
 def register_user(
     user_id: str,
     user_name: str,
-    password: str,
+    password_hash: str,
     supplier_plant_code: str,
     supplier_code: str,
     group_id: int,
@@ -59,64 +84,39 @@ def register_user(
     """
     Calls SP with @Type = 'INSERT'.
     Inserts a new row into TM_Supplier_End_User.
+    `password_hash` is already hashed by the caller (see password_utils).
     Returns {'RESULT': 'Y'} on success, or error message if user exists.
     """
-    conn = get_db_connection()
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            SET NOCOUNT ON;
-            EXEC [dbo].[PRC_UserSupplier_EndUser]
-                @Type               = 'INSERT',
-                @UserID             = ?,
-                @UserName           = ?,
-                @Password           = ?,
-                @SupplierPlantCode  = ?,
-                @SupplierCode       = ?,
-                @GroupID            = ?,
-                @CreatedBy          = ?,
-                @DensoPlant         = ?,
-                @PackingStation     = ?,
-                @EmailId            = ?,
-                @SupplierMacID      = ?
-            """,
-            user_id,
-            user_name,
-            hash_password(password),
-            supplier_plant_code,
-            supplier_code,
-            group_id,
-            created_by,
-            denso_plant or "",
-            packing_station or "",
-            email_id or "",
-            supplier_mac_id or "",
+    with get_db_connection() as conn, transaction(conn):
+        cursor = _exec_user_sp(
+            conn,
+            "INSERT",
+            UserID=user_id,
+            UserName=user_name,
+            Password=password_hash,
+            SupplierPlantCode=supplier_plant_code,
+            SupplierCode=supplier_code,
+            GroupID=group_id,
+            CreatedBy=created_by,
+            DensoPlant=denso_plant or "",
+            PackingStation=packing_station or "",
+            EmailId=email_id or "",
+            SupplierMacID=supplier_mac_id or "",
         )
-        result = _fetch_sp_result(cursor)
-        conn.commit()
+        result = fetch_sp_result(cursor)
 
         # The SP's INSERT ignores @SupplierCode (reads from a mapping
         # table instead) and omits EmailId entirely.  Patch both with
-        # a direct UPDATE so the values supplied by the caller are
-        # actually persisted.
+        # a direct UPDATE, in the same transaction as the SP, so the
+        # values supplied by the caller are actually persisted.
         if result and result.get("RESULT") == "Y":
+            cursor = prepared_cursor(conn, _SQL_PATCH_NEW_USER)
             cursor.execute(
-                """
-                UPDATE TM_Supplier_End_User
-                   SET SupplierCode = ?,
-                       EmailId      = ?
-                 WHERE UserID = ?
-                """,
-                supplier_code or "",
-                email_id or "",
-                user_id,
+                _SQL_PATCH_NEW_USER, supplier_code or "", email_id or "", user_id
             )
-            conn.commit()
 
-        return result
-    finally:
-        conn.close()
+    invalidate_lookup_caches()
+    return result
 
 
 # ─────────────────────────────────────────────────────────────────
@@ -125,7 +125,7 @@ def register_user(
 def update_user(
     user_id: str,
     user_name: str,
-    password: str,
+    password_hash: str,
     supplier_plant_code: str,
     supplier_code: str,
     group_id: int,
@@ -135,53 +135,31 @@ def update_user(
     """
     Calls SP with @Type = 'UPDATE'.
     Updates the user row in TM_Supplier_End_User.
+    `password_hash` is already hashed by the caller.
     """
-    conn = get_db_connection()
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            SET NOCOUNT ON;
-            EXEC [dbo].[PRC_UserSupplier_EndUser]
-                @Type               = 'UPDATE',
-                @UserID             = ?,
-                @UserName           = ?,
-                @Password           = ?,
-                @SupplierPlantCode  = ?,
-                @SupplierCode       = ?,
-                @GroupID            = ?,
-                @CreatedBy          = ?,
-                @EmailId            = ?
-            """,
-            user_id,
-            user_name,
-            hash_password(password),
-            supplier_plant_code,
-            supplier_code,
-            group_id,
-            created_by,
-            email_id or "",
+    with get_db_connection() as conn, transaction(conn):
+        cursor = _exec_user_sp(
+            conn,
+            "UPDATE",
+            UserID=user_id,
+            UserName=user_name,
+            Password=password_hash,
+            SupplierPlantCode=supplier_plant_code,
+            SupplierCode=supplier_code,
+            GroupID=group_id,
+            CreatedBy=created_by,
+            EmailId=email_id or "",
         )
-        result = _fetch_sp_result(cursor)
-        conn.commit()
+        result = fetch_sp_result(cursor)
 
         # SP UPDATE also overrides SupplierCode from mapping table.
-        # Patch with the caller's value.
+        # Patch with the caller's value in the same transaction.
         if result and result.get("RESULT") == "Y" and supplier_code:
-            cursor.execute(
-                """
-                UPDATE TM_Supplier_End_User
-                   SET SupplierCode = ?
-                 WHERE UserID = ?
-                """,
-                supplier_code,
-                user_id,
-            )
-            conn.commit()
+            cursor = prepared_cursor(conn, _SQL_PATCH_SUPPLIER_CODE)
+            cursor.execute(_SQL_PATCH_SUPPLIER_CODE, supplier_code, user_id)
 
-        return result
-    finally:
-        conn.close()
+    invalidate_lookup_caches()
+    return result
 
 
 # ─────────────────────────────────────────────────────────────────
@@ -192,152 +170,164 @@ def delete_user(user_id: str) -> dict | None:
     Calls SP with @Type = 'DELETE'.
     Deletes user from TM_Supplier_End_User.
     """
-    conn = get_db_connection()
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            SET NOCOUNT ON;
-            EXEC [dbo].[PRC_UserSupplier_EndUser]
-                @Type   = 'DELETE',
-                @UserID = ?
-            """,
-            user_id,
-        )
-        result = _fetch_sp_result(cursor)
-        conn.commit()
+    with get_db_connection() as conn:
+        cursor = _exec_user_sp(conn, "DELETE", UserID=user_id)
+        result = fetch_sp_result(cursor)
+        invalidate_lookup_caches()
         return result
-    finally:
-        conn.close()
 
 
 # ─────────────────────────────────────────────────────────────────
 # 4.  SELECT – Get all users (for admin listing)
 # ─────────────────────────────────────────────────────────────────
+@cached(_users_cache, lock=_lookup_lock)
 def get_all_users(created_by: str) -> list[dict]:
     """
     Calls SP with @Type = 'SELECT'.
-    Returns all users created by the given admin/supervisor.
+    Returns all users created by the given admin/supervisor as one list
+    (cached for 60s, cleared on user writes).  The list is shared: do
+    not mutate it.
     """
-    conn = get_db_connection()
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            EXEC [dbo].[PRC_UserSupplier_EndUser]
-                @Type       = 'SELECT',
-                @CreatedBy  = ?
-            """,
-            created_by,
+    return list(
+        iter_sp_rows(
+            "[dbo].[PRC_UserSupplier_EndUser]", "SELECT", CreatedBy=created_by
         )
-        rows = cursor.fetchall()
-        return _rows_to_list(cursor, rows)
-    finally:
-        conn.close()
+    )
+
+
+# Same columns as @Type = 'SELECT', for the direct user queries below.
+_USER_SELECT = """
+    SELECT um.UserID, um.USERNAME AS UserName, um.SupplierPlantCode,
+           um.GroupID, gm.GroupName, um.CreatedBy,
+           CONVERT(varchar(10), um.CreatedOn, 103) AS CreatedOn
+    FROM TM_Supplier_End_User um
+    LEFT JOIN TM_Supplier_GROUP gm ON um.GroupID = gm.GroupID
+"""
+
+_SQL_USER_BY_ID = _USER_SELECT + "WHERE um.UserID = ?"
+
+
+def get_user_by_id(user_id: str) -> dict | None:
+    """
+    A single user by UserID (same columns as @Type = 'SELECT'), looked
+    up in SQL instead of scanning the full user list.  fetch_single
+    finishes the statement before the connection is released.
+    """
+    with get_db_connection() as conn:
+        cursor = prepared_cursor(conn, _SQL_USER_BY_ID)
+        cursor.execute(_SQL_USER_BY_ID, user_id)
+        return fetch_single(cursor)
+
+
+# ─────────────────────────────────────────────────────────────────
+# 4b. SEARCH – Filter the user list in SQL
+# ─────────────────────────────────────────────────────────────────
+# Searchable API column → SQL expression.  Only these names are ever
+# formatted into the query text; the search value is always bound.
+SEARCH_COLUMNS = {
+    "user_id": "um.UserID",
+    "user_name": "um.USERNAME",
+    "supplier_plant_code": "um.SupplierPlantCode",
+    "group_id": "CAST(um.GroupID AS varchar(20))",
+    "group_name": "gm.GroupName",
+    "created_by": "um.CreatedBy",
+}
+
+
+def search_users(created_by: str, column_name: str, search_value: str) -> list[dict]:
+    """
+    Users created by `created_by` whose `column_name` contains
+    `search_value` (case-insensitive), filtered in SQL so only matching
+    rows cross the wire.  Returns the same columns as @Type = 'SELECT'.
+    `column_name` must be a key of SEARCH_COLUMNS.
+    """
+    pattern = (
+        search_value.replace("\\", "\\\\")
+        .replace("%", "\\%")
+        .replace("_", "\\_")
+        .replace("[", "\\[")
+    )
+    sql = f"""{_USER_SELECT}
+        WHERE um.CreatedBy = ?
+          AND {SEARCH_COLUMNS[column_name]}
+              COLLATE SQL_Latin1_General_CP1_CI_AS LIKE ? ESCAPE '\\'
+    """
+    with get_db_connection() as conn:
+        cursor = prepared_cursor(conn, sql)
+        cursor.execute(sql, created_by, f"%{pattern}%")
+        users = rows_to_list(cursor, cursor.fetchall())
+        release_cursor(cursor)
+        return users
 
 
 # ─────────────────────────────────────────────────────────────────
 # 5.  SELECT_GROUP – Get available groups (User, Supervisor, TL)
 # ─────────────────────────────────────────────────────────────────
+@cached(_groups_cache, lock=_lookup_lock)
 def get_user_groups() -> list[dict]:
     """
     Calls SP with @Type = 'SELECT_GROUP'.
-    Returns available GroupID/GroupName pairs.
+    Returns available GroupID/GroupName pairs (cached for 5 minutes).
     """
-    conn = get_db_connection()
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            EXEC [dbo].[PRC_UserSupplier_EndUser]
-                @Type = 'SELECT_GROUP'
-            """
-        )
+    with get_db_connection() as conn:
+        cursor = _exec_user_sp(conn, "SELECT_GROUP")
         rows = cursor.fetchall()
-        return _rows_to_list(cursor, rows)
-    finally:
-        conn.close()
+        return rows_to_list(cursor, rows)
 
 
 # ─────────────────────────────────────────────────────────────────
 # 6.  Get_Plant – Get available plant codes
 # ─────────────────────────────────────────────────────────────────
+@cached(_plants_cache, lock=_lookup_lock)
 def get_plants(created_by: str) -> list[dict]:
     """
     Calls SP with @Type = 'Get_Plant'.
-    Returns available PlantCode/PlantName pairs.
+    Returns available PlantCode/PlantName pairs (cached for 60s).
     """
-    conn = get_db_connection()
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            EXEC [dbo].[PRC_UserSupplier_EndUser]
-                @Type       = 'Get_Plant',
-                @CreatedBy  = ?
-            """,
-            created_by,
-        )
+    with get_db_connection() as conn:
+        cursor = _exec_user_sp(conn, "Get_Plant", CreatedBy=created_by)
         rows = cursor.fetchall()
-        return _rows_to_list(cursor, rows)
-    finally:
-        conn.close()
+        return rows_to_list(cursor, rows)
 
 
 # ─────────────────────────────────────────────────────────────────
 # 7.  Get_Packing_Station – Get stations for a plant
 # ─────────────────────────────────────────────────────────────────
+@cached(_stations_cache, lock=_lookup_lock)
 def get_packing_stations(plant_code: str, supplier_code: str) -> list[dict]:
     """
     Calls SP with @Type = 'Get_Packing_Station'.
-    Returns available packing stations for the given plant.
+    Returns available packing stations for the given plant (cached for 60s).
     """
-    conn = get_db_connection()
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            EXEC [dbo].[PRC_UserSupplier_EndUser]
-                @Type               = 'Get_Packing_Station',
-                @SupplierPlantCode  = ?,
-                @SupplierCode       = ?
-            """,
-            plant_code,
-            supplier_code,
+    with get_db_connection() as conn:
+        cursor = _exec_user_sp(
+            conn,
+            "Get_Packing_Station",
+            SupplierPlantCode=plant_code,
+            SupplierCode=supplier_code,
         )
         rows = cursor.fetchall()
-        return _rows_to_list(cursor, rows)
-    finally:
-        conn.close()
+        return rows_to_list(cursor, rows)
 
 
 # ─────────────────────────────────────────────────────────────────
 # 8.  UPDATEPASSWORD – Change user password
 # ─────────────────────────────────────────────────────────────────
-def change_password(user_id: str, old_password: str, new_password: str) -> dict | None:
+def change_password(
+    user_id: str, old_password_hash: str, new_password_hash: str
+) -> dict | None:
     """
     Calls SP with @Type = 'UPDATEPASSWORD'.
-    Verifies old password, sets new password (both hashed).
+    Verifies old password hash, sets new password hash.
     Returns {'RESULT': 'Y'} on success, or error message.
     """
-    conn = get_db_connection()
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            SET NOCOUNT ON;
-            EXEC [dbo].[PRC_UserSupplier_EndUser]
-                @Type         = 'UPDATEPASSWORD',
-                @UserID       = ?,
-                @Password     = ?,
-                @NewPassword  = ?
-            """,
-            user_id,
-            hash_password(old_password),
-            hash_password(new_password),
+    with get_db_connection() as conn:
+        cursor = _exec_user_sp(
+            conn,
+            "UPDATEPASSWORD",
+            UserID=user_id,
+            Password=old_password_hash,
+            NewPassword=new_password_hash,
         )
-        result = _fetch_sp_result(cursor)
-        conn.commit()
+        result = fetch_sp_result(cursor)
         return result
-    finally:
-        conn.close()
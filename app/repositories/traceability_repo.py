@@ -9,124 +9,149 @@ VALIDATEUSER_PC / VALIDATEUSER / VALIDATE_DEVICE_SUPERVISOR paths:
 
 To avoid these issues the three login helpers execute direct SQL with
 LEFT JOINs, replicating the SP logic without the bugs.
+
+The login queries rely on the indexes in
+sql/migrations/001_login_lookup_indexes.sql to seek rather than scan,
+and on READ_COMMITTED_SNAPSHOT (sql/migrations/002_*) instead of
+WITH (NOLOCK) hints to avoid blocking behind writers.
 """
 
-from app.utils.database import get_db_connection
-from app.utils.password_utils import hash_password
+from datetime import datetime
+from threading import RLock
 
+from cachetools import TTLCache, cached
 
-def _row_to_dict(cursor, row):
-    """Convert a pyodbc Row to a plain dict using cursor.description."""
-    if row is None:
-        return None
-    columns = [col[0] for col in cursor.description]
-    return dict(zip(columns, row))
+from app.utils.database import get_db_connection, prepared_cursor
+from app.utils.db_helpers import (
+    exec_sp,
+    fetch_single,
+    fetch_sp_result,
+    iter_sp_rows,
+    rows_to_list,
+)
+from app.utils.password_utils import hash_password
 
 
-def _fetch_sp_result(cursor):
-    """
-    The SPs often do INSERT/UPDATE followed by SELECT, or have
-    multiple SELECT statements (some may return 0 rows).  Skip
-    forward through result-sets until we find one with actual data.
-    """
-    while True:
-        if cursor.description is not None:
-            row = cursor.fetchone()
-            if row is not None:
-                return _row_to_dict(cursor, row)
-        if not cursor.nextset():
-            break
-    return None
+def _exec_print_kanban(conn, sp_type: str, **params):
+    """EXEC [dbo].[PRC_PrintKanban] via the shared parameterized dispatcher."""
+    return exec_sp(conn, "[dbo].[PRC_PrintKanban]", sp_type, **params)
 
 
 # ─────────────────────────────────────────────────────────────────
 # 1.  VALIDATEUSER_PC  –  initial app login
 # ─────────────────────────────────────────────────────────────────
+_SQL_VALIDATE_USER_PC_ADMIN = """
+    SELECT 'Y' AS RESULT,
+           um.UserID, um.USERNAME, um.PASSWORD, um.EmailId,
+           um.GroupID, gm.GroupName, um.IsSupplier,
+           '' AS SupplierCode, '' AS DensoPlant,
+           '' AS SupplierPlantCode, '' AS PackingStation,
+           '' AS PlantName,
+           CASE WHEN EXISTS (
+               SELECT 1 FROM TM_SuppUser_SuppCode_Mapping m
+               WHERE m.UserID = um.UserID
+           ) THEN 1 ELSE 0 END AS HasSupplierMapping
+    FROM TM_Supplier_UserMaster um
+    INNER JOIN TM_Group gm ON um.GroupID = gm.GroupID
+    WHERE um.UserID = ?
+      AND um.Password = ?
+      AND ISNULL(um.IsSupplier, '') = 'Y'
+"""
+
+_SQL_VALIDATE_USER_PC_END_USER = """
+    SELECT TOP 1
+           'Y' AS RESULT,
+           um.UserID, um.USERNAME, um.PASSWORD, um.EmailId,
+           um.GroupID, gm.GroupName,
+           'N' AS IsSupplier,
+           um.SupplierCode, um.DensoPlant,
+           um.SupplierPlantCode, um.PackingStation,
+           ISNULL(P.PlantName, '') AS PlantName
+    FROM TM_Supplier_End_User um
+    INNER JOIN TM_Supplier_GROUP gm ON um.GroupID = gm.GroupID
+    LEFT JOIN TM_Supplier_Plant P
+        ON P.PlantCode = um.SupplierPlantCode
+       AND P.SupplierCode IN (
+           SELECT value
+           FROM STRING_SPLIT(LTRIM(RTRIM(um.SupplierCode)), ',')
+       )
+    WHERE um.UserID = ?
+      AND um.Password = ?
+"""
+
+
 def validate_user_pc(user_id: str, password: str) -> dict | None:
     """
     Replaces SP @Type = 'VALIDATEUSER_PC'.
 
     Logic:
       1. Check TM_Supplier_UserMaster (admin / IsSupplier='Y') first.
-         If found, verify they have a TM_SuppUser_SuppCode_Mapping row.
+         If found, verify they have a TM_SuppUser_SuppCode_Mapping row
+         (EXISTS folded into the same query).
       2. Otherwise check TM_Supplier_End_User.
          Uses LEFT JOIN to TM_Supplier_Plant so login succeeds even
-         when plant mapping is not configured yet.
+         when plant mapping is not configured yet.  The user's
+         comma-separated SupplierCode list is matched with STRING_SPLIT
+         (database compatibility level >= 130, checked by
+         sql/migrations/004_*) so the join can seek on SupplierCode.
     """
     hashed_pwd = hash_password(password)
-    conn = get_db_connection()
-    try:
-        cursor = conn.cursor()
-
+    with get_db_connection() as conn:
         # ── Path 1: Supplier-admin users ─────────────────────────
+        cursor = prepared_cursor(conn, _SQL_VALIDATE_USER_PC_ADMIN)
         cursor.execute(
-            """
-            SELECT 'Y' AS RESULT,
-                   um.UserID, um.USERNAME, um.PASSWORD, um.EmailId,
-                   um.GroupID, gm.GroupName, um.IsSupplier,
-                   '' AS SupplierCode, '' AS DensoPlant,
-                   '' AS SupplierPlantCode, '' AS PackingStation,
-                   '' AS PlantName
-            FROM TM_Supplier_UserMaster um WITH (NOLOCK)
-            INNER JOIN TM_Group gm ON um.GroupID = gm.GroupID
-            WHERE um.UserID = ?
-              AND um.Password = ?
-              AND ISNULL(um.IsSupplier, '') = 'Y'
-            """,
+            _SQL_VALIDATE_USER_PC_ADMIN,
             user_id,
             hashed_pwd,
         )
-        row = cursor.fetchone()
-        if row:
-            # Must also have a supplier-code mapping
-            cur2 = conn.cursor()
-            cur2.execute(
-                "SELECT 1 FROM TM_SuppUser_SuppCode_Mapping WHERE UserID = ?",
-                user_id,
-            )
-            if cur2.fetchone():
-                return _row_to_dict(cursor, row)
+        # fetch_single finishes the statement, so path 2 can run on
+        # the same connection.
+        result = fetch_single(cursor)
+        if result:
+            # Must also have a supplier-code mapping (checked in the
+            # same statement to avoid a second round-trip)
+            if result.pop("HasSupplierMapping"):
+                return result
             return {"RESULT": "N", "MSG": "No User mapped with supplier"}
 
         # ── Path 2: End users (LEFT JOIN to plant table) ─────────
+        cursor = prepared_cursor(conn, _SQL_VALIDATE_USER_PC_END_USER)
         cursor.execute(
-            """
-            SELECT TOP 1
-                   'Y' AS RESULT,
-                   um.UserID, um.USERNAME, um.PASSWORD, um.EmailId,
-                   um.GroupID, gm.GroupName,
-                   'N' AS IsSupplier,
-                   um.SupplierCode, um.DensoPlant,
-                   um.SupplierPlantCode, um.PackingStation,
-                   ISNULL(P.PlantName, '') AS PlantName
-            FROM TM_Supplier_End_User um WITH (NOLOCK)
-            INNER JOIN TM_Supplier_GROUP gm ON um.GroupID = gm.GroupID
-            LEFT JOIN (
-                SELECT DISTINCT PlantCode, PlantName, SupplierCode
-                FROM TM_Supplier_Plant
-            ) P ON P.PlantCode = um.SupplierPlantCode
-                AND (
-                    ',' + LTRIM(RTRIM(um.SupplierCode)) + ','
-                    LIKE '%,' + LTRIM(RTRIM(P.SupplierCode)) + ',%'
-                )
-            WHERE um.UserID = ?
-              AND um.Password = ?
-            """,
+            _SQL_VALIDATE_USER_PC_END_USER,
             user_id,
             hashed_pwd,
         )
-        row = cursor.fetchone()
-        if row:
-            return _row_to_dict(cursor, row)
-
-        return None
-    finally:
-        conn.close()
+        return fetch_single(cursor)
 
 
 # ─────────────────────────────────────────────────────────────────
 # 2.  VALIDATEUSER  –  traceability tag screen auto-fill
 # ─────────────────────────────────────────────────────────────────
+_SQL_VALIDATE_USER = """
+    SELECT TOP 1
+           um.SupplierCode,
+           um.SupplierPlantCode,
+           ISNULL(um.PackingStation, '') AS PackingStation,
+           um.UserID, um.USERNAME,
+           ISNULL(P.PlantName, '') AS PASSWORD,
+           um.EmailId, um.GroupID, gm.GroupName,
+           um.CreatedBy,
+           CONVERT(varchar(10), um.CreatedOn, 103) AS CreatedOn
+    FROM TM_Supplier_End_User um
+    INNER JOIN TM_Supplier_GROUP gm ON um.GroupID = gm.GroupID
+    LEFT JOIN (
+        SELECT DISTINCT PlantCode, PlantName
+        FROM TM_Supplier_Plant
+    ) P ON P.PlantCode = um.SupplierPlantCode
+    WHERE um.UserID = ? AND um.Password = ?
+      AND EXISTS (
+          SELECT 1 FROM TM_Supplier_GROUP_RIGHTS gr
+          WHERE gr.GroupID = gm.GroupName AND gr.[View] = 1
+            AND gr.ScreenId IN ('3001','2003')
+      )
+"""
+
+
 def validate_user(user_id: str, password: str) -> dict | None:
     """
     Replaces SP @Type = 'VALIDATEUSER'.
@@ -135,63 +160,47 @@ def validate_user(user_id: str, password: str) -> dict | None:
     plant data is not fully configured.
     """
     hashed_pwd = hash_password(password)
-    conn = get_db_connection()
-    try:
-        cursor = conn.cursor()
-
-        # Check group rights first
+    with get_db_connection() as conn:
+        cursor = prepared_cursor(conn, _SQL_VALIDATE_USER)
         cursor.execute(
-            """
-            SET NOCOUNT ON;
-
-            DECLARE @gID varchar(20), @gName varchar(100);
-            SELECT @gID = GroupID
-            FROM TM_Supplier_End_User
-            WHERE UserID = ? AND Password = ?;
-            SELECT @gName = GroupName
-            FROM TM_Supplier_GROUP
-            WHERE GroupID = @gID;
-
-            IF EXISTS (
-                SELECT 1 FROM TM_Supplier_GROUP_RIGHTS
-                WHERE GroupID = @gName AND [View] = 1
-                  AND ScreenId IN ('3001','2003')
-            )
-            BEGIN
-                SELECT TOP 1
-                       um.SupplierCode,
-                       um.SupplierPlantCode,
-                       ISNULL(um.PackingStation, '') AS PackingStation,
-                       um.UserID, um.USERNAME,
-                       ISNULL(P.PlantName, '') AS PASSWORD,
-                       um.EmailId, um.GroupID, gm.GroupName,
-                       um.CreatedBy,
-                       CONVERT(varchar(10), um.CreatedOn, 103) AS CreatedOn
-                FROM TM_Supplier_End_User um WITH (NOLOCK)
-                INNER JOIN TM_Supplier_GROUP gm ON um.GroupID = gm.GroupID
-                LEFT JOIN (
-                    SELECT DISTINCT PlantCode, PlantName
-                    FROM TM_Supplier_Plant
-                ) P ON P.PlantCode = um.SupplierPlantCode
-                WHERE um.UserID = ? AND um.Password = ?
-            END
-            """,
-            user_id,
-            hashed_pwd,
+            _SQL_VALIDATE_USER,
             user_id,
             hashed_pwd,
         )
-        result = _fetch_sp_result(cursor)
+        result = fetch_single(cursor)
         if result is None:
             return None
         return result
-    finally:
-        conn.close()
 
 
 # ─────────────────────────────────────────────────────────────────
 # 3.  VALIDATE_DEVICE_SUPERVISOR  –  supervisor auth for model change
 # ─────────────────────────────────────────────────────────────────
+_SQL_VALIDATE_DEVICE_SUPERVISOR = """
+    SELECT TOP 1
+           ISNULL(um.SupplierCode, '') AS SupplierCode,
+           um.SupplierPlantCode,
+           um.PackingStation,
+           um.UserID, um.USERNAME,
+           ISNULL(P.PlantName, '') AS PlantName,
+           um.EmailId, um.GroupID, gm.GroupName,
+           um.CreatedBy,
+           CONVERT(varchar(10), um.CreatedOn, 103) AS CreatedOn
+    FROM TM_Supplier_End_User um
+    INNER JOIN TM_Supplier_GROUP gm ON um.GroupID = gm.GroupID
+    LEFT JOIN (
+        SELECT DISTINCT PlantCode, PlantName
+        FROM TM_Supplier_Plant
+    ) P ON P.PlantCode = um.SupplierPlantCode
+    WHERE um.UserID = ? AND um.Password = ?
+      AND EXISTS (
+          SELECT 1 FROM TM_Supplier_GROUP_RIGHTS gr
+          WHERE gr.GroupID = gm.GroupName AND gr.[View] = 1
+            AND gr.ScreenId IN ('3002','2003')
+      )
+"""
+
+
 def validate_device_supervisor(user_id: str, password: str) -> dict | None:
     """
     Replaces SP @Type = 'VALIDATE_DEVICE_SUPERVISOR'.
@@ -199,62 +208,30 @@ def validate_device_supervisor(user_id: str, password: str) -> dict | None:
     Uses LEFT JOIN to TM_Supplier_Plant.
     """
     hashed_pwd = hash_password(password)
-    conn = get_db_connection()
-    try:
-        cursor = conn.cursor()
-
+    with get_db_connection() as conn:
+        cursor = prepared_cursor(conn, _SQL_VALIDATE_DEVICE_SUPERVISOR)
         cursor.execute(
-            """
-            SET NOCOUNT ON;
-
-            DECLARE @gID1 varchar(20), @gName1 varchar(100);
-            SELECT @gID1 = GroupID
-            FROM TM_Supplier_End_User
-            WHERE UserID = ? AND Password = ?;
-            SELECT @gName1 = GroupName
-            FROM TM_Supplier_GROUP
-            WHERE GroupID = @gID1;
-
-            IF EXISTS (
-                SELECT 1 FROM TM_Supplier_GROUP_RIGHTS
-                WHERE GroupID = @gName1 AND [View] = 1
-                  AND ScreenId IN ('3002','2003')
-            )
-            BEGIN
-                SELECT TOP 1
-                       ISNULL(um.SupplierCode, '') AS SupplierCode,
-                       um.SupplierPlantCode,
-                       um.PackingStation,
-                       um.UserID, um.USERNAME,
-                       ISNULL(P.PlantName, '') AS PlantName,
-                       um.EmailId, um.GroupID, gm.GroupName,
-                       um.CreatedBy,
-                       CONVERT(varchar(10), um.CreatedOn, 103) AS CreatedOn
-                FROM TM_Supplier_End_User um WITH (NOLOCK)
-                INNER JOIN TM_Supplier_GROUP gm ON um.GroupID = gm.GroupID
-                LEFT JOIN (
-                    SELECT DISTINCT PlantCode, PlantName
-                    FROM TM_Supplier_Plant
-                ) P ON P.PlantCode = um.SupplierPlantCode
-                WHERE um.UserID = ? AND um.Password = ?
-            END
-            """,
-            user_id,
-            hashed_pwd,
+            _SQL_VALIDATE_DEVICE_SUPERVISOR,
             user_id,
             hashed_pwd,
         )
-        result = _fetch_sp_result(cursor)
+        result = fetch_single(cursor)
         if result is None:
             return None
         return result
-    finally:
-        conn.close()
 
 
 # ─────────────────────────────────────────────────────────────────
 # 4a.  GET_SUPPLIERPART  –  model dropdown list (after supervisor login)
 # ─────────────────────────────────────────────────────────────────
+# The dropdown only changes with part master data, so the list is kept
+# briefly per (station, plant, user) instead of re-running the SP on
+# every supervisor login.
+_supplier_parts_lock = RLock()
+_supplier_parts_cache = TTLCache(maxsize=512, ttl=60)
+
+
+@cached(_supplier_parts_cache, lock=_supplier_parts_lock)
 def get_supplier_parts(
     station_no: str,
     plant_code: str,
@@ -264,29 +241,16 @@ def get_supplier_parts(
     Calls PRC_PrintKanban SP with @Type = 'GET_SUPPLIERPART'.
     Returns list of SupplierPart numbers for the Model Change dropdown.
     Parameters match the SP: @StationNo, @PlantCode, @PrintedBy (logged-in user).
+    The whole list is cached for 60 s; callers must not mutate the rows.
     """
-    conn = get_db_connection()
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            SET NOCOUNT ON;
-            EXEC [dbo].[PRC_PrintKanban]
-                @Type       = 'GET_SUPPLIERPART',
-                @StationNo  = ?,
-                @PlantCode  = ?,
-                @PrintedBy  = ?
-            """,
-            station_no,
-            plant_code,
-            printed_by,
-        )
-        rows = cursor.fetchall()
-        if not rows:
-            return None
-        return [_row_to_dict(cursor, row) for row in rows]
-    finally:
-        conn.close()
+    rows = iter_sp_rows(
+        "[dbo].[PRC_PrintKanban]",
+        "GET_SUPPLIERPART",
+        StationNo=station_no,
+        PlantCode=plant_code,
+        PrintedBy=printed_by,
+    )
+    return list(rows) or None
 
 
 # ─────────────────────────────────────────────────────────────────
@@ -303,30 +267,19 @@ def get_print_parameter(
     Returns full part details for auto-filling the form after
     the supervisor selects a SupplierPart from the dropdown.
     """
-    conn = get_db_connection()
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            SET NOCOUNT ON;
-            EXEC [dbo].[PRC_PrintKanban]
-                @Type            = 'GET_PRINT_PARAMETER',
-                @SupplierPartNo  = ?,
-                @SupplierCode    = ?,
-                @PlantCode       = ?,
-                @StationNo       = ?
-            """,
-            supplier_part_no,
-            supplier_code,
-            plant_code,
-            station_no,
+    with get_db_connection() as conn:
+        cursor = _exec_print_kanban(
+            conn,
+            "GET_PRINT_PARAMETER",
+            SupplierPartNo=supplier_part_no,
+            SupplierCode=supplier_code,
+            PlantCode=plant_code,
+            StationNo=station_no,
         )
         rows = cursor.fetchall()
         if not rows:
             return None
-        return [_row_to_dict(cursor, row) for row in rows]
-    finally:
-        conn.close()
+        return rows_to_list(cursor, rows)
 
 
 # ─────────────────────────────────────────────────────────────────
@@ -337,31 +290,28 @@ def get_shift(supplier_code: str) -> dict | None:
     Calls PRC_PrintKanban SP with @Type = 'GET_SHIFT'.
     Returns current shift information (Shift, ShiftFrom, ShiftTo).
     """
-    conn = get_db_connection()
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            EXEC [dbo].[PRC_PrintKanban]
-                @Type            = 'GET_SHIFT',
-                @SupplierCode    = ?
-            """,
-            supplier_code,
-        )
-        row = cursor.fetchone()
-        if row is None:
-            return None
-        return _row_to_dict(cursor, row)
-    finally:
-        conn.close()
+    with get_db_connection() as conn:
+        cursor = _exec_print_kanban(conn, "GET_SHIFT", SupplierCode=supplier_code)
+        return fetch_sp_result(cursor)
 
 
 # ─────────────────────────────────────────────────────────────────
 # 6.  Lock/Unlock Field State Management
 # ─────────────────────────────────────────────────────────────────
 
-# In-memory storage for field lock states (in production, use Redis/Database)
-_field_lock_states = {}
+# In-memory storage for field lock states (in production, use Redis/Database).
+# Bounded and time-limited so abandoned station keys do not accumulate;
+# every access goes through _lock_mu since handlers run on many threads.
+#
+# Expiry semantics: a dropped entry reads as *unlocked*, i.e. it lifts
+# the lock without supervisor auth.  So a lock lapses only 24 h after
+# it was set (well past any shift; reads do not extend it), and LRU
+# eviction only happens once more than 10,000 stations are locked at
+# the same time.  A process restart still clears every lock.
+_LOCK_TTL_SECONDS = 24 * 60 * 60
+_field_lock_states = TTLCache(maxsize=10_000, ttl=_LOCK_TTL_SECONDS)
+_lock_mu = RLock()
+_UNLOCKED: dict = {}
 
 
 def lock_fields(supplier_code: str, plant_code: str, station_no: str) -> bool:
@@ -370,10 +320,11 @@ def lock_fields(supplier_code: str, plant_code: str, station_no: str) -> bool:
     Returns True if successfully locked.
     """
     lock_key = f"{supplier_code}:{plant_code}:{station_no}"
-    _field_lock_states[lock_key] = {
-        "locked": True,
-        "locked_at": str(__import__("datetime").datetime.now()),
-    }
+    with _lock_mu:
+        _field_lock_states[lock_key] = {
+            "locked": True,
+            "locked_at": datetime.now().isoformat(),
+        }
     return True
 
 
@@ -383,8 +334,8 @@ def unlock_fields(supplier_code: str, plant_code: str, station_no: str) -> bool:
     Returns True if successfully unlocked.
     """
     lock_key = f"{supplier_code}:{plant_code}:{station_no}"
-    if lock_key in _field_lock_states:
-        del _field_lock_states[lock_key]
+    with _lock_mu:
+        _field_lock_states.pop(lock_key, None)
     return True
 
 
@@ -394,4 +345,5 @@ def is_fields_locked(supplier_code: str, plant_code: str, station_no: str) -> bo
     Returns True if locked, False if unlocked.
     """
     lock_key = f"{supplier_code}:{plant_code}:{station_no}"
-    return lock_key in _field_lock_states and _field_lock_states[lock_key].get("locked", False)
+    with _lock_mu:
+        return _field_lock_states.get(lock_key, _UNLOCKED).get("locked", False)
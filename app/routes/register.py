@@ -11,9 +11,16 @@ Endpoints:
   GET    /api/register/groups            → Get available groups (for dropdown)
   GET    /api/register/plants            → Get available plants (for dropdown)
   GET    /api/register/stations          → Get packing stations (for dropdown)
+  GET    /api/register/form-options      → Groups + plants + stations in one call
 """
 
-from fastapi import APIRouter, HTTPException
+import asyncio
+import hashlib
+
+import orjson
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
 
 from app.models.supplier_end_user import (
     SupplierEndUserCreate,
@@ -30,6 +37,23 @@ router = APIRouter(
 service = SupplierEndUserService()
 
 
+def _cacheable(request: Request, result: dict, cache_control: str):
+    """
+    Send a dropdown result with a weak ETag so the browser can cache it
+    (per `cache_control`) and revalidate with If-None-Match, getting a
+    bodyless 304 when nothing changed.  Failed lookups are not cached.
+    """
+    if not result.get("success"):
+        return result
+    body = orjson.dumps(jsonable_encoder(result))
+    etag = f'W/"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
 # ── 1. Register User ───────────────────────────────────────────────
 @router.post("/user", response_model=dict)
 def register_user(body: SupplierEndUserCreate):
@@ -163,42 +187,88 @@ def list_users(created_by: str = ""):
 
 # ── 6. Get Groups (dropdown) ──────────────────────────────────────
 @router.get("/groups", response_model=dict)
-def get_groups():
+def get_groups(request: Request):
     """
     **Get available user groups**
 
     Returns GroupID/GroupName pairs for the registration dropdown.
     Use GroupID when registering a user or supervisor.
+    Browser-cacheable for 5 minutes (same as the server-side cache).
 
     SP call: `PRC_UserSupplier_EndUser @Type = 'SELECT_GROUP'`
     """
     result = service.get_groups()
-    return result
+    return _cacheable(request, result, "private, max-age=300")
 
 
 # ── 7. Get Plants (dropdown) ──────────────────────────────────────
 @router.get("/plants", response_model=dict)
-def get_plants(created_by: str = ""):
+def get_plants(request: Request, created_by: str = ""):
     """
     **Get available plant codes**
 
     Returns PlantCode/PlantName pairs for the registration dropdown.
+    Always revalidated via ETag (304 when unchanged), since user writes
+    can change it.
 
     SP call: `PRC_UserSupplier_EndUser @Type = 'Get_Plant'`
     """
     result = service.get_plants(created_by)
-    return result
+    return _cacheable(request, result, "private, no-cache")
 
 
 # ── 8. Get Packing Stations (dropdown) ────────────────────────────
 @router.get("/stations", response_model=dict)
-def get_packing_stations(plant_code: str, supplier_code: str):
+def get_packing_stations(request: Request, plant_code: str, supplier_code: str):
     """
     **Get packing stations for a plant**
 
     Returns StationNo/StationName pairs for the registration dropdown.
+    Always revalidated via ETag (304 when unchanged), since user writes
+    can change it.
 
     SP call: `PRC_UserSupplier_EndUser @Type = 'Get_Packing_Station'`
     """
     result = service.get_packing_stations(plant_code, supplier_code)
-    return result
+    return _cacheable(request, result, "private, no-cache")
+
+
+# ── 9. Get all dropdowns for the registration form ────────────────
+@router.get("/form-options", response_model=dict)
+async def get_form_options(
+    created_by: str = "",
+    plant_code: str = "",
+    supplier_code: str = "",
+):
+    """
+    **Get groups, plants and packing stations in one call**
+
+    The registration form needs all three dropdowns on render.  The
+    three SP calls are independent, so they run concurrently on the
+    threadpool (each on its own pooled connection) instead of the
+    client issuing three sequential requests.
+
+    Stations are only fetched when `plant_code` is given.
+    """
+    calls = [
+        run_in_threadpool(service.get_groups),
+        run_in_threadpool(service.get_plants, created_by),
+    ]
+    if plant_code:
+        calls.append(
+            run_in_threadpool(service.get_packing_stations, plant_code, supplier_code)
+        )
+    results = await asyncio.gather(*calls)
+    groups, plants = results[0], results[1]
+    stations = results[2] if plant_code else {"success": True, "data": []}
+
+    success = groups["success"] and plants["success"] and stations["success"]
+    return {
+        "success": success,
+        "message": "Form options loaded" if success else "Failed to load some form options",
+        "data": {
+            "groups": groups["data"],
+            "plants": plants["data"],
+            "stations": stations["data"],
+        },
+    }
@@ -1,3 +1,5 @@
+from dataclasses import dataclass
+
 from fastapi import APIRouter, Depends, HTTPException, Header
 from typing import Optional, List
 from app.models.supplier_end_user import (
@@ -17,12 +19,20 @@ router = APIRouter(
 service = SupplierEndUserService()
 
 
+@dataclass(slots=True, frozen=True)
+class AuthCtx:
+    """Caller identity taken from the session headers."""
+    user_id: str
+    supplier_code: str
+    group_name: str = ""
+
+
 # Mock authentication - In production, use proper JWT/OAuth2
 async def get_current_user(
     x_user_id: str = Header(None),
     x_supplier_code: str = Header(None),
     x_group_name: str = Header(None)
-) -> dict:
+) -> AuthCtx:
     """
     Get current user from headers
     In production, use fastapi.security for proper authentication
@@ -30,17 +40,13 @@ async def get_current_user(
     if not x_user_id or not x_supplier_code:
         raise HTTPException(status_code=401, detail="Missing authentication headers")
     
-    return {
-        "user_id": x_user_id,
-        "supplier_code": x_supplier_code,
-        "group_name": x_group_name or ""
-    }
+    return AuthCtx(x_user_id, x_supplier_code, x_group_name or "")
 
 
 @router.post("/register", response_model=dict)
 async def register_user(
     user_data: SupplierEndUserCreate,
-    current_user: dict = Depends(get_current_user)
+    current_user: AuthCtx = Depends(get_current_user)
 ):
     """
     Register a new supplier end user
@@ -57,13 +63,9 @@ async def register_user(
     - X-Supplier-Code: Supplier code (from session)
     - X-Group-Name: Group name (from session)
     """
-    # Authorization check
-    if not current_user.get("user_id"):
-        raise HTTPException(status_code=403, detail="Unauthorized action attempted")
-    
     # Set created_by from current user
-    user_data.created_by = current_user["user_id"]
-    user_data.supplier_code = current_user["supplier_code"]
+    user_data.created_by = current_user.user_id
+    user_data.supplier_code = current_user.supplier_code
     
     # Call service to create user
     result = service.create_user(user_data)
@@ -78,7 +80,7 @@ async def register_user(
 async def update_user(
     user_id: str,
     user_data: SupplierEndUserUpdate,
-    current_user: dict = Depends(get_current_user)
+    current_user: AuthCtx = Depends(get_current_user)
 ):
     """
     Update an existing supplier end user
@@ -97,17 +99,14 @@ async def update_user(
     - X-User-ID: Current user ID (from session)
     - X-Supplier-Code: Supplier code (from session)
     """
-    if not current_user.get("user_id"):
-        raise HTTPException(status_code=403, detail="Unauthorized action attempted")
-    
     # Set updated_by from current user
-    user_data.updated_by = current_user["user_id"]
+    user_data.updated_by = current_user.user_id
     
     # Call service to update user
     result = service.update_user(
         user_id,
         user_data,
-        current_user["supplier_code"]
+        current_user.supplier_code
     )
     
     if not result["success"]:
@@ -119,7 +118,7 @@ async def update_user(
 @router.delete("/{user_id}", response_model=dict)
 async def delete_user(
     user_id: str,
-    current_user: dict = Depends(get_current_user)
+    current_user: AuthCtx = Depends(get_current_user)
 ):
     """
     Delete a supplier end user
@@ -138,13 +137,10 @@ async def delete_user(
     - X-User-ID: Current user ID (from session)
     - X-Supplier-Code: Supplier code (from session)
     """
-    if not current_user.get("user_id"):
-        raise HTTPException(status_code=403, detail="Unauthorized action attempted")
-    
     # Call service to delete user
     result = service.delete_user(
         user_id,
-        current_user["supplier_code"]
+        current_user.supplier_code
     )
     
     if not result["success"]:
@@ -155,7 +151,7 @@ async def delete_user(
 
 @router.get("/list", response_model=dict)
 async def get_users(
-    current_user: dict = Depends(get_current_user)
+    current_user: AuthCtx = Depends(get_current_user)
 ):
     """
     Get all supplier end users
@@ -174,8 +170,8 @@ async def get_users(
     """
     # Call service to fetch all users
     result = service.get_all_users(
-        current_user["supplier_code"],
-        current_user["user_id"]
+        current_user.supplier_code,
+        current_user.user_id
     )
     
     return result
@@ -184,7 +180,7 @@ async def get_users(
 @router.get("/{user_id}", response_model=dict)
 async def get_user(
     user_id: str,
-    current_user: dict = Depends(get_current_user)
+    current_user: AuthCtx = Depends(get_current_user)
 ):
     """
     Get a specific supplier end user by ID
@@ -199,7 +195,7 @@ async def get_user(
     """
     result = service.get_user(
         user_id,
-        current_user["supplier_code"]
+        current_user.supplier_code
     )
     
     if not result["success"]:
@@ -212,7 +208,7 @@ async def get_user(
 async def search_users(
     column_name: str,
     search_value: str,
-    current_user: dict = Depends(get_current_user)
+    current_user: AuthCtx = Depends(get_current_user)
 ):
     """
     Search users by column
@@ -225,40 +221,22 @@ async def search_users(
     ```
     
     Query Parameters:
-    - column_name: Column to search in
-    - search_value: Value to search for (supports LIKE pattern)
+    - column_name: Column to search in (user_id, user_name,
+      supplier_plant_code, group_id, group_name, created_by)
+    - search_value: Substring to search for (case-insensitive)
     
     Request Headers:
     - X-User-ID: Current user ID (from session)
     - X-Supplier-Code: Supplier code (from session)
     """
-    # Fetch all users first
-    result = service.get_all_users(
-        current_user["supplier_code"],
-        current_user["user_id"]
+    # Filtering runs in SQL against a whitelist of columns
+    result = service.search_users(
+        current_user.user_id,
+        column_name,
+        search_value
     )
     
     if not result["success"]:
-        return result
-    
-    users = result.get("data", [])
-    
-    # Filter results based on search
-    filtered_users = []
-    for user in users:
-        if column_name in user:
-            user_value = str(user[column_name]).lower()
-            search_val = search_value.lower()
-            
-            if search_val in user_value:
-                filtered_users.append(user)
+        raise HTTPException(status_code=400, detail=result["message"])
     
-    return {
-        "success": True,
-        "message": f"Found {len(filtered_users)} records",
-        "result": "Y",
-        "total_records": len(filtered_users),
-        "search_column": column_name,
-        "search_value": search_value,
-        "data": filtered_users
-    }
+    return result
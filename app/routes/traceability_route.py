@@ -9,15 +9,21 @@ Flow (matches the desktop app screenshots):
   5. POST /confirm-model            → GET_PRINT_PARAMETER (select model → auto-fill all fields)
   6. POST /lock-fields              → Lock form fields
   7. POST /unlock-fields            → Unlock form fields (supervisor auth required)
+  8. POST /login-full               → Steps 1 + 2 in one request
 
   Lot No. 1 & Lot No. 2 fields are entered manually by the user.
 """
 
-from fastapi import APIRouter, HTTPException
+import asyncio
+
+from fastapi import APIRouter, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
 
 from app.schemas.traceability_schema import (
     LoginRequest,
     LoginResponse,
+    LoginFullResponse,
     TraceabilityUserRequest,
     TraceabilityUserResponse,
     SupervisorLoginRequest,
@@ -39,6 +45,16 @@ router = APIRouter(
 )
 
 
+def _json_response(result: BaseModel) -> Response:
+    """
+    Serialise the service's response model straight to JSON in
+    pydantic-core.  Returning a Response skips FastAPI's response_model
+    pass and jsonable_encoder walk; `response_model` on each route is
+    kept for the OpenAPI schema.
+    """
+    return Response(result.model_dump_json(), media_type="application/json")
+
+
 # ── 1. Login  ──────────────────────────────────────────────────────
 @router.post("/login", response_model=LoginResponse)
 def login(body: LoginRequest):
@@ -54,7 +70,7 @@ def login(body: LoginRequest):
     result = traceability_service.login(body.user_id, body.password)
     if not result.success:
         raise HTTPException(status_code=401, detail=result.message)
-    return result
+    return _json_response(result)
 
 
 # ── 2. Traceability Tag auto-fill  ─────────────────────────────────
@@ -71,7 +87,7 @@ def get_traceability_user(body: TraceabilityUserRequest):
     result = traceability_service.get_traceability_user(body.user_id, body.password)
     if not result.success:
         raise HTTPException(status_code=403, detail=result.message)
-    return result
+    return _json_response(result)
 
 
 # ── 3. Supervisor login (Model Change)  ────────────────────────────
@@ -89,7 +105,7 @@ def supervisor_login(body: SupervisorLoginRequest):
     result = traceability_service.validate_supervisor(body.user_id, body.password)
     if not result.success:
         raise HTTPException(status_code=403, detail=result.message)
-    return result
+    return _json_response(result)
 
 
 # ── 4. Get Model List (after supervisor login)  ────────────────
@@ -123,7 +139,7 @@ def get_model_list(body: GetModelListRequest):
     )
     if not result.success:
         raise HTTPException(status_code=400, detail=result.message)
-    return result
+    return _json_response(result)
 
 
 # ── 5. Confirm Model Selection (auto-fill all fields)  ────────────
@@ -165,18 +181,20 @@ def confirm_model_selection(body: ConfirmModelSelectionRequest):
     )
     if not result.success:
         raise HTTPException(status_code=400, detail=result.message)
-    return result
+    return _json_response(result)
 
 
 # ── 6. Lock Fields (make them read-only)  ──────────────────────
 @router.post("/lock-fields", response_model=LockFieldsResponse)
-def lock_fields_endpoint(body: LockFieldsRequest):
+async def lock_fields_endpoint(body: LockFieldsRequest):
     """
     **Step 6 – Lock Fields**
 
     When user clicks the **Lock** button, all form fields become 
     read-only (greyed out). The UI shows a "visibility lock" icon.
     """
+    # In-memory only (no SP call), so it runs on the event loop instead
+    # of taking a worker thread like the DB-bound handlers.
     result = traceability_service.lock_fields(
         body.supplier_code,
         body.plant_code,
@@ -184,7 +202,7 @@ def lock_fields_endpoint(body: LockFieldsRequest):
     )
     if not result.success:
         raise HTTPException(status_code=400, detail=result.message)
-    return result
+    return _json_response(result)
 
 
 # ── 7. Unlock Fields (with supervisor auth)  ──────────────────
@@ -207,5 +225,49 @@ def unlock_fields_endpoint(body: UnlockFieldsRequest):
     )
     if not result.success:
         raise HTTPException(status_code=403, detail=result.message)
-    return result
+    return _json_response(result)
+
 
+# ── 8. Login + Traceability Tag auto-fill  ─────────────────────────
+@router.post("/login-full", response_model=LoginFullResponse)
+async def login_full(body: LoginRequest):
+    """
+    **Steps 1 + 2 in one request**
+
+    Runs the app login (`VALIDATEUSER_PC`) and the Traceability Tag
+    auto-fill lookup (`VALIDATEUSER`) concurrently on the threadpool,
+    so app start costs one client round-trip instead of two.
+
+    Fails with 401 exactly like `/login`.  `traceability_user` is
+    null when the user has no traceability-tag rights or plant, or when
+    that lookup fails; the message then says so.
+    """
+    login_res, trace_res = await asyncio.gather(
+        run_in_threadpool(traceability_service.login, body.user_id, body.password),
+        run_in_threadpool(
+            traceability_service.get_traceability_user, body.user_id, body.password
+        ),
+        return_exceptions=True,
+    )
+    if isinstance(login_res, BaseException):
+        raise login_res
+    if not login_res.success:
+        raise HTTPException(status_code=401, detail=login_res.message)
+
+    if isinstance(trace_res, BaseException):
+        message = f"{login_res.message}; traceability lookup failed"
+        trace_data = None
+    elif not trace_res.success:
+        message = f"{login_res.message}; {trace_res.message}"
+        trace_data = None
+    else:
+        message = login_res.message
+        trace_data = trace_res.data
+
+    result = LoginFullResponse(
+        success=True,
+        message=message,
+        login=login_res.data,
+        traceability_user=trace_data,
+    )
+    return _json_response(result)
@@ -65,6 +65,14 @@ class TraceabilityUserResponse(BaseModel):
     data: Optional[TraceabilityUserData] = None
 
 
+class LoginFullResponse(BaseModel):
+    """App login + Traceability Tag auto-fill in one response."""
+    success: bool
+    message: str
+    login: Optional[LoginUserData] = None
+    traceability_user: Optional[TraceabilityUserData] = None
+
+
 class SupervisorData(BaseModel):
     supplier_code: Optional[str] = None
     supplier_plant_code: Optional[str] = None
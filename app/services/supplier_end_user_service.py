@@ -4,6 +4,7 @@ Maps raw SP results → typed response models.
 """
 
 from app.repositories import register_repo
+from app.utils.password_utils import hash_password
 from app.models.supplier_end_user import (
     SupplierEndUserCreate,
     SupplierEndUserUpdate,
@@ -27,7 +28,7 @@ class SupplierEndUserService:
             result = register_repo.register_user(
                 user_id=user_data.user_id,
                 user_name=user_data.user_name,
-                password=user_data.password,
+                password_hash=hash_password(user_data.password),
                 supplier_plant_code=user_data.supplier_plant_code,
                 supplier_code=user_data.supplier_code or "",
                 group_id=user_data.group_id,
@@ -85,7 +86,7 @@ class SupplierEndUserService:
             result = register_repo.update_user(
                 user_id=user_id,
                 user_name=user_data.user_name or "",
-                password=user_data.password or "",
+                password_hash=hash_password(user_data.password or ""),
                 supplier_plant_code=user_data.supplier_plant_code or "",
                 supplier_code=supplier_code,
                 group_id=user_data.group_id or 0,
@@ -129,10 +130,8 @@ class SupplierEndUserService:
     def get_all_users(self, supplier_code: str, created_by: str) -> dict:
         """Get all users. Calls SP @Type = 'SELECT'."""
         try:
-            rows = register_repo.get_all_users(created_by)
-
             users = []
-            for row in rows:
+            for row in register_repo.get_all_users(created_by):
                 users.append({
                     "user_id": row.get("UserID", ""),
                     "user_name": row.get("UserName", ""),
@@ -158,29 +157,77 @@ class SupplierEndUserService:
                 "data": [],
             }
 
+    # ─────────────────────────────────────────────────────────────
+    # 4b. Search users
+    # ─────────────────────────────────────────────────────────────
+    def search_users(
+        self, created_by: str, column_name: str, search_value: str
+    ) -> dict:
+        """Search the user list by column; the filter runs in SQL."""
+        if column_name not in register_repo.SEARCH_COLUMNS:
+            return {
+                "success": False,
+                "message": (
+                    f"Column '{column_name}' is not searchable. Allowed: "
+                    + ", ".join(register_repo.SEARCH_COLUMNS)
+                ),
+                "data": [],
+            }
+        try:
+            users = [
+                {
+                    "user_id": row.get("UserID", ""),
+                    "user_name": row.get("UserName", ""),
+                    "supplier_plant_code": row.get("SupplierPlantCode", ""),
+                    "group_id": row.get("GroupID"),
+                    "group_name": row.get("GroupName", ""),
+                    "created_by": row.get("CreatedBy", ""),
+                    "created_on": row.get("CreatedOn", ""),
+                }
+                for row in register_repo.search_users(
+                    created_by, column_name, search_value
+                )
+            ]
+
+            return {
+                "success": True,
+                "message": f"Found {len(users)} records",
+                "result": "Y",
+                "total_records": len(users),
+                "search_column": column_name,
+                "search_value": search_value,
+                "data": users,
+            }
+
+        except Exception as e:
+            return {
+                "success": False,
+                "message": f"Search failed: {str(e)}",
+                "data": [],
+            }
+
     # ─────────────────────────────────────────────────────────────
     # 5.  Get single user
     # ─────────────────────────────────────────────────────────────
     def get_user(self, user_id: str, supplier_code: str) -> dict:
-        """Get a single user by ID from the user list."""
+        """Get a single user by ID."""
         try:
-            rows = register_repo.get_all_users("")
-            for row in rows:
-                if row.get("UserID") == user_id:
-                    return {
-                        "success": True,
-                        "message": "User found",
-                        "data": {
-                            "user_id": row.get("UserID", ""),
-                            "user_name": row.get("UserName", ""),
-                            "supplier_plant_code": row.get("SupplierPlantCode", ""),
-                            "group_id": row.get("GroupID"),
-                            "group_name": row.get("GroupName", ""),
-                            "created_by": row.get("CreatedBy", ""),
-                            "created_on": row.get("CreatedOn", ""),
-                        },
-                    }
-            return {"success": False, "message": "User not found"}
+            row = register_repo.get_user_by_id(user_id)
+            if row is None:
+                return {"success": False, "message": "User not found"}
+            return {
+                "success": True,
+                "message": "User found",
+                "data": {
+                    "user_id": row.get("UserID", ""),
+                    "user_name": row.get("UserName", ""),
+                    "supplier_plant_code": row.get("SupplierPlantCode", ""),
+                    "group_id": row.get("GroupID"),
+                    "group_name": row.get("GroupName", ""),
+                    "created_by": row.get("CreatedBy", ""),
+                    "created_on": row.get("CreatedOn", ""),
+                },
+            }
 
         except Exception as e:
             return {"success": False, "message": f"Failed: {str(e)}"}
@@ -259,8 +306,8 @@ class SupplierEndUserService:
 
             result = register_repo.change_password(
                 user_id=data.user_id,
-                old_password=data.old_password,
-                new_password=data.new_password,
+                old_password_hash=hash_password(data.old_password),
+                new_password_hash=hash_password(data.new_password),
             )
 
             if result is None:
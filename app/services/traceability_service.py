@@ -123,24 +123,23 @@ def get_model_list(
 
     SP call: PRC_PrintKanban @Type = 'GET_SUPPLIERPART'
     """
-    rows = traceability_repo.get_supplier_parts(
-        station_no, plant_code, printed_by
-    )
+    parts = [
+        SupplierPartItem(
+            supplier_part=row.get("SupplierPart", ""),
+            supplier_name=row.get("SupplierName", row.get("SupplierPart", "")),
+        )
+        for row in traceability_repo.get_supplier_parts(
+            station_no, plant_code, printed_by
+        ) or ()
+    ]
 
-    if rows is None or len(rows) == 0:
+    if not parts:
         return GetModelListResponse(
             success=False,
             message="No models found for this station/plant",
             data=None,
         )
 
-    parts = []
-    for row in rows:
-        parts.append(SupplierPartItem(
-            supplier_part=row.get("SupplierPart", ""),
-            supplier_name=row.get("SupplierName", row.get("SupplierPart", "")),
-        ))
-
     return GetModelListResponse(
         success=True,
         message=f"Found {len(parts)} model(s)",
@@ -1,5 +1,9 @@
 import pyodbc
 import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -11,6 +15,13 @@ DB_PASSWORD = os.getenv("DB_PASSWORD", "")
 DB_DRIVER = os.getenv("DB_DRIVER", "ODBC Driver 17 for SQL Server")
 USE_WINDOWS_AUTH = os.getenv("USE_WINDOWS_AUTH", "true").lower() == "true"
 
+# Connection pool sizing
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Idle connections older than this are pinged with SELECT 1 before reuse
+DB_POOL_RECYCLE_CHECK = float(os.getenv("DB_POOL_RECYCLE_CHECK", "60"))
+
 # Build connection string with Windows Auth (recommended) or SQL Auth
 if USE_WINDOWS_AUTH or (not DB_USER and not DB_PASSWORD):
     # Windows Authentication (Integrated Security)
@@ -32,7 +43,205 @@ else:
         f"TrustServerCertificate=yes;"
     )
 
+# Keep ODBC driver-manager pooling on as a second layer (must be set
+# before the first connect).
+pyodbc.pooling = True
+
+
+# ─────────────────────────────────────────────────────────────────
+# Connection pool
+# ─────────────────────────────────────────────────────────────────
+# Idle connections are kept as (conn, last_used) in a LIFO queue so the
+# most recently used (warmest) connection is handed out first.  At most
+# DB_POOL_MAX_SIZE connections are open at any time; callers block for
+# up to DB_POOL_TIMEOUT seconds when the pool is exhausted.
+_idle = queue.LifoQueue()
+_slots = threading.BoundedSemaphore(DB_POOL_MAX_SIZE)
+
+# Per-connection {sql: cursor} cache.  pyodbc skips SQLPrepare when a
+# cursor re-executes the same SQL text, so the server reuses its prepared
+# handle (sp_execute) instead of sp_prepexec on every call.  Keyed by
+# id(conn) because pyodbc Connection objects take no attributes; entries
+# are dropped when the connection is discarded.
+_statement_cache: dict[int, dict[str, pyodbc.Cursor]] = {}
+# Cached cursors executed during the current checkout that may still
+# hold unread rows or result-sets.  SQL Server (without MARS) allows one
+# active statement per connection, so these are drained on check-in.
+_open_statements: dict[int, set[pyodbc.Cursor]] = {}
+
+
+def _open_connection():
+    """
+    Open a brand-new physical connection in autocommit mode (the ADO.NET
+    default the SPs were written for).  Reads then run without an
+    implicit transaction, and multi-statement writes manage their own
+    BEGIN TRAN / COMMIT inside the batch.
+    """
+    return pyodbc.connect(CONNECTION_STRING, autocommit=True)
+
+
+def _is_alive(conn) -> bool:
+    """Cheap liveness probe for a connection that has been idle a while."""
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+        cursor.close()
+        return True
+    except pyodbc.Error:
+        return False
+
+
+def _discard(conn):
+    _statement_cache.pop(id(conn), None)
+    _open_statements.pop(id(conn), None)
+    try:
+        conn.close()
+    except pyodbc.Error:
+        pass
+
+
+def _checkout():
+    if not _slots.acquire(timeout=DB_POOL_TIMEOUT):
+        raise TimeoutError("Timed out waiting for a free database connection")
+    try:
+        while True:
+            try:
+                conn, last_used = _idle.get_nowait()
+            except queue.Empty:
+                return _open_connection()
+            if time.monotonic() - last_used < DB_POOL_RECYCLE_CHECK or _is_alive(conn):
+                return conn
+            _discard(conn)
+    except BaseException:
+        _slots.release()
+        raise
+
+
+def _drain(cursor):
+    """Discard the cursor's unread rows and remaining result-sets."""
+    while cursor.nextset():
+        pass
+
+
+def release_cursor(cursor):
+    """
+    Finish the statement on `cursor`: drop whatever it has not read so
+    the connection is free for the next statement.  A no-op on a
+    statement that is already finished.  Readers that stop early call
+    this; prepared cursors left unfinished are drained on check-in.
+    """
+    _open_statements.get(id(cursor.connection), set()).discard(cursor)
+    _drain(cursor)
 
+
+def _checkin(conn, broken: bool):
+    # Autocommit connections hold no open transaction between calls, so
+    # no rollback round trip is needed before reuse, but every statement
+    # must be finished or the next borrower gets "Connection is busy".
+    try:
+        if not broken:
+            try:
+                for cursor in _open_statements.pop(id(conn), ()):
+                    _drain(cursor)
+            except pyodbc.Error:
+                broken = True
+        if broken:
+            _discard(conn)
+        else:
+            _idle.put((conn, time.monotonic()))
+    finally:
+        _slots.release()
+
+
+def prepared_cursor(conn, sql: str):
+    """
+    Return a cursor on `conn` dedicated to `sql`.  Executing the same
+    statement on it again reuses the prepared handle.  Execute it right
+    away: its results are drained when the connection goes back to the
+    pool (or earlier via release_cursor), since an unfinished statement
+    would leave the pooled connection busy.
+    """
+    cursors = _statement_cache.setdefault(id(conn), {})
+    cursor = cursors.get(sql)
+    if cursor is None:
+        cursor = cursors[sql] = conn.cursor()
+    _open_statements.setdefault(id(conn), set()).add(cursor)
+    return cursor
+
+
+@contextmanager
 def get_db_connection():
-    """Get a new database connection."""
-    return pyodbc.connect(CONNECTION_STRING)
+    """
+    Borrow a pooled database connection.
+
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            ...
+
+    The connection goes back to the pool on exit.  If a driver error
+    escapes the block the connection is closed instead of reused.
+    Cursors from prepared_cursor are drained on exit; close any other
+    cursor (or read it to the end) before leaving the block.
+    """
+    conn = _checkout()
+    broken = False
+    try:
+        yield conn
+    except pyodbc.Error:
+        broken = True
+        raise
+    finally:
+        _checkin(conn, broken)
+
+
+@contextmanager
+def transaction(conn):
+    """
+    Run the block as one explicit transaction on a pooled (autocommit)
+    connection: commit on success, roll back on any exception.
+
+        with get_db_connection() as conn, transaction(conn):
+            ...
+
+    Autocommit is only switched back on once the transaction has ended;
+    if COMMIT / ROLLBACK itself fails, the driver error marks the
+    connection broken and get_db_connection discards it.
+    """
+    conn.autocommit = False
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        conn.autocommit = True
+        raise
+    conn.commit()
+    conn.autocommit = True
+
+
+def init_pool():
+    """
+    Pre-open DB_POOL_MIN_SIZE connections (call on application startup)
+    so the first requests do not pay the connect + login handshake.
+    Best effort: stops quietly if the database is unreachable, the pool
+    then simply opens connections on demand.
+    """
+    opened = []
+    try:
+        for _ in range(min(DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE) - _idle.qsize()):
+            opened.append(_open_connection())
+    except pyodbc.Error:
+        pass
+    now = time.monotonic()
+    for conn in opened:
+        _idle.put((conn, now))
+
+
+def close_pool():
+    """Close every idle pooled connection (call on application shutdown)."""
+    while True:
+        try:
+            conn, _ = _idle.get_nowait()
+        except queue.Empty:
+            break
+        _discard(conn)
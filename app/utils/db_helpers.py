@@ -0,0 +1,121 @@
+"""
+Shared pyodbc helpers used by every repository module.
+
+Row conversion, SP result fetching and the parameterized
+`EXEC <proc> @Type = ?` dispatcher live here so each optimisation
+applies to all repositories at once.
+"""
+
+from app.utils.database import get_db_connection, prepared_cursor, release_cursor
+
+# Rows pulled from the driver per fetchmany() when streaming an SP.
+FETCH_BATCH_SIZE = 1000
+
+
+def columns(cursor):
+    """Column names of the current result-set, built once per result-set."""
+    return tuple(col[0] for col in cursor.description)
+
+
+def row_to_dict(cursor, row):
+    """Convert a pyodbc Row to a plain dict using cursor.description."""
+    if row is None:
+        return None
+    return dict(zip(columns(cursor), row))
+
+
+def rows_to_list(cursor, rows):
+    """Convert multiple pyodbc Rows to a list of dicts."""
+    if not rows:
+        return []
+    cols = columns(cursor)
+    return [dict(zip(cols, row)) for row in rows]
+
+
+def iter_rows(cursor, batch_size: int):
+    """
+    Yield the current result-set as dicts, pulling `batch_size` rows
+    from the driver at a time so the whole set is never materialised.
+    """
+    cols = None
+    while True:
+        batch = cursor.fetchmany(batch_size)
+        if not batch:
+            return
+        cols = cols or columns(cursor)
+        for row in batch:
+            yield dict(zip(cols, row))
+
+
+def fetch_sp_result(cursor):
+    """
+    The SPs often do INSERT/UPDATE followed by SELECT, or have
+    multiple SELECT statements (some may return 0 rows), and pyodbc
+    may see a DML row-count as the first result-set.  Skip forward
+    with nextset() until we find a result-set with actual data.  Any
+    result-sets after it are drained so the connection is left free.
+    """
+    while True:
+        if cursor.description is not None:
+            row = cursor.fetchone()
+            if row is not None:
+                result = row_to_dict(cursor, row)
+                release_cursor(cursor)
+                return result
+        if not cursor.nextset():
+            break
+    return None
+
+
+def fetch_single(cursor):
+    """
+    Fetch the first row of an inline SELECT this repo owns, i.e. a
+    statement whose first result-set is known to be the data (no DML
+    row-counts in front of it).  Use fetch_sp_result for SP results,
+    whose result-set layout is not ours.  The statement is finished
+    before returning, so the connection is free for the next statement.
+    """
+    if cursor.description is None:
+        release_cursor(cursor)
+        return None
+    result = row_to_dict(cursor, cursor.fetchone())
+    release_cursor(cursor)
+    return result
+
+
+def exec_sp(conn, procedure: str, sp_type: str, **params):
+    """
+    EXEC `procedure` with @Type bound as a parameter and only the given
+    named parameters (SP defaults apply to the rest).  The statement
+    text depends only on the procedure and parameter names, so SQL
+    Server caches one plan for it and the statement is prepared once
+    per pooled connection.  Returns the cursor holding the results.
+    """
+    sql = _exec_sql(procedure, params)
+    cursor = prepared_cursor(conn, sql)
+    cursor.execute(sql, sp_type, *params.values())
+    return cursor
+
+
+def iter_sp_rows(procedure: str, sp_type: str, **params):
+    """
+    Like exec_sp, but borrows its own connection and yields the first
+    result-set as dicts, FETCH_BATCH_SIZE rows at a time.  Runs on a
+    dedicated cursor (not prepared_cursor): the consumer may stop early,
+    and closing the cursor discards the pending rows before the
+    connection goes back to the pool.
+    """
+    sql = _exec_sql(procedure, params)
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.arraysize = FETCH_BATCH_SIZE
+            cursor.execute(sql, sp_type, *params.values())
+            yield from iter_rows(cursor, FETCH_BATCH_SIZE)
+        finally:
+            cursor.close()
+
+
+def _exec_sql(procedure: str, params: dict) -> str:
+    assignments = "".join(f", @{name} = ?" for name in params)
+    return f"SET NOCOUNT ON; EXEC {procedure} @Type = ?{assignments}"
@@ -0,0 +1,40 @@
+/*
+    Supporting indexes for the login / rights-check queries in
+    app/repositories/traceability_repo.py.
+
+    - TM_Supplier_GROUP_RIGHTS : rights check (GroupID + ScreenId, [View] = 1)
+    - TM_SuppUser_SuppCode_Mapping : supplier-admin mapping EXISTS on UserID
+    - TM_Supplier_Plant : LEFT JOIN on PlantCode (+ SupplierCode via
+      STRING_SPLIT) returning PlantName
+
+    Turns the per-login scans into index seeks.  Safe to re-run.
+*/
+
+IF NOT EXISTS (
+    SELECT 1 FROM sys.indexes
+    WHERE name = 'IX_TM_Supplier_GROUP_RIGHTS_GroupID_ScreenId'
+      AND object_id = OBJECT_ID('dbo.TM_Supplier_GROUP_RIGHTS')
+)
+    CREATE NONCLUSTERED INDEX IX_TM_Supplier_GROUP_RIGHTS_GroupID_ScreenId
+        ON dbo.TM_Supplier_GROUP_RIGHTS (GroupID, ScreenId)
+        INCLUDE ([View]);
+GO
+
+IF NOT EXISTS (
+    SELECT 1 FROM sys.indexes
+    WHERE name = 'IX_TM_SuppUser_SuppCode_Mapping_UserID'
+      AND object_id = OBJECT_ID('dbo.TM_SuppUser_SuppCode_Mapping')
+)
+    CREATE NONCLUSTERED INDEX IX_TM_SuppUser_SuppCode_Mapping_UserID
+        ON dbo.TM_SuppUser_SuppCode_Mapping (UserID);
+GO
+
+IF NOT EXISTS (
+    SELECT 1 FROM sys.indexes
+    WHERE name = 'IX_TM_Supplier_Plant_PlantCode'
+      AND object_id = OBJECT_ID('dbo.TM_Supplier_Plant')
+)
+    CREATE NONCLUSTERED INDEX IX_TM_Supplier_Plant_PlantCode
+        ON dbo.TM_Supplier_Plant (PlantCode, SupplierCode)
+        INCLUDE (PlantName);
+GO
@@ -0,0 +1,15 @@
+/*
+    Enable READ COMMITTED SNAPSHOT isolation (row versioning).
+
+    Readers no longer take shared locks, so the WITH (NOLOCK) hints that
+    used to be sprinkled over the login queries are unnecessary - and
+    they could return uncommitted, torn or duplicated rows.  New queries
+    in app/repositories should not add NOLOCK hints.
+
+    Requires exclusive access for a moment: WITH ROLLBACK IMMEDIATE
+    rolls back open transactions on the database.  Run in a maintenance
+    window.  Run in the target database (the one named by DB_NAME).
+*/
+
+ALTER DATABASE CURRENT SET READ_COMMITTED_SNAPSHOT ON WITH ROLLBACK IMMEDIATE;
+GO
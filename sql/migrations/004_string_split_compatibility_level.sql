@@ -0,0 +1,21 @@
+/*
+    Check that the database can run STRING_SPLIT.
+
+    The end-user login query in app/repositories/traceability_repo.py
+    (VALIDATEUSER_PC) splits the user's SupplierCode list with
+    STRING_SPLIT.  That function is only available at database
+    compatibility level 130 or higher; on a SQL Server 2016+ instance
+    whose database still runs at a lower level, end-user login fails
+    with "Invalid object name 'STRING_SPLIT'".
+
+    This script only checks and fails loudly - raising the level can
+    change query plans elsewhere, so do it deliberately, e.g.:
+
+        ALTER DATABASE [DTraceProddb] SET COMPATIBILITY_LEVEL = 130;
+
+    Run in the target database.  Safe to re-run.
+*/
+
+IF (SELECT compatibility_level FROM sys.databases WHERE name = DB_NAME()) < 130
+    THROW 50001, 'Database compatibility level must be 130 or higher for STRING_SPLIT (used by the end-user login query).', 1;
+GO
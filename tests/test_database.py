@@ -0,0 +1,190 @@
+"""
+Tests for the connection pool and prepared-statement cache in
+app/utils/database.py, run against a fake driver that enforces SQL
+Server's one-active-statement-per-connection rule (no MARS).
+
+    python -m unittest discover -s tests -t .
+"""
+
+import queue
+import threading
+import unittest
+from unittest import mock
+
+from app.utils import database
+from app.utils.db_helpers import fetch_single
+
+pyodbc = database.pyodbc
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.active = None          # cursor with an unfinished statement
+        self.autocommit = True
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeCursor:
+    """Every statement returns two result-sets of two rows each."""
+
+    fail_nextset = False
+
+    def __init__(self, conn):
+        self.connection = conn
+        self.description = None
+        self._rows = []
+        self._sets = []
+
+    def execute(self, sql, *params):
+        conn = self.connection
+        if conn.closed:
+            raise pyodbc.Error("connection is closed")
+        if conn.active is not None and conn.active is not self:
+            raise pyodbc.Error("Connection is busy with results for another command")
+        conn.active = self
+        self._sets = [[(1,), (2,)], [(3,), (4,)]]
+        self._next()
+        return self
+
+    def _next(self):
+        if self._sets:
+            self._rows = self._sets.pop(0)
+            self.description = (("n",),)
+            return True
+        self._rows, self.description = [], None
+        if self.connection.active is self:
+            self.connection.active = None
+        return False
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def nextset(self):
+        if self.fail_nextset:
+            raise pyodbc.Error("communication link failure")
+        return self._next()
+
+    def close(self):
+        if self.connection.active is self:
+            self.connection.active = None
+
+
+class PoolTestCase(unittest.TestCase):
+    max_size = 2
+
+    def setUp(self):
+        self.opened = []
+
+        def connect(*args, **kwargs):
+            conn = FakeConnection()
+            self.opened.append(conn)
+            return conn
+
+        patches = [
+            mock.patch.object(database.pyodbc, "connect", connect, create=True),
+            mock.patch.object(database, "_idle", queue.LifoQueue()),
+            mock.patch.object(
+                database, "_slots", threading.BoundedSemaphore(self.max_size)
+            ),
+            mock.patch.object(database, "_statement_cache", {}),
+            mock.patch.object(database, "_open_statements", {}),
+            mock.patch.object(database, "DB_POOL_TIMEOUT", 0.05),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+
+class CheckoutTests(PoolTestCase):
+    def test_idle_connection_is_reused(self):
+        with database.get_db_connection() as first:
+            pass
+        with database.get_db_connection() as second:
+            pass
+        self.assertIs(first, second)
+        self.assertEqual(len(self.opened), 1)
+
+    def test_checkout_times_out_when_pool_is_exhausted(self):
+        with database.get_db_connection(), database.get_db_connection():
+            with self.assertRaises(TimeoutError):
+                with database.get_db_connection():
+                    pass
+        # Both slots were given back despite the timeout.
+        with database.get_db_connection(), database.get_db_connection():
+            pass
+        self.assertEqual(len(self.opened), 2)
+
+    def test_stale_idle_connection_is_replaced(self):
+        with database.get_db_connection() as first:
+            pass
+        first.closed = True  # liveness probe will fail
+        with mock.patch.object(database, "DB_POOL_RECYCLE_CHECK", 0):
+            with database.get_db_connection() as second:
+                pass
+        self.assertIsNot(first, second)
+
+
+class CheckinTests(PoolTestCase):
+    def test_driver_error_discards_connection(self):
+        with self.assertRaises(pyodbc.Error):
+            with database.get_db_connection() as conn:
+                raise pyodbc.Error("boom")
+        self.assertTrue(conn.closed)
+        self.assertEqual(database._idle.qsize(), 0)
+        with database.get_db_connection() as fresh:
+            pass
+        self.assertIsNot(conn, fresh)
+
+    def test_other_errors_keep_connection(self):
+        with self.assertRaises(ValueError):
+            with database.get_db_connection() as conn:
+                raise ValueError("not a driver problem")
+        self.assertFalse(conn.closed)
+        self.assertEqual(database._idle.qsize(), 1)
+
+
+class PreparedCursorTests(PoolTestCase):
+    max_size = 1
+
+    def test_same_sql_reuses_cursor(self):
+        with database.get_db_connection() as conn:
+            first = database.prepared_cursor(conn, "SELECT 1")
+            first.execute("SELECT 1")
+        with database.get_db_connection() as conn:
+            self.assertIs(database.prepared_cursor(conn, "SELECT 1"), first)
+
+    def test_unfinished_statement_is_drained_on_checkin(self):
+        with database.get_db_connection() as conn:
+            cursor = database.prepared_cursor(conn, "SELECT n")
+            cursor.execute("SELECT n")
+            cursor.fetchone()  # stop after the first row
+        self.assertIsNone(conn.active)
+        with database.get_db_connection() as again:
+            again.cursor().execute("SELECT 2")
+        self.assertIs(again, conn)
+
+    def test_fetch_single_frees_connection_inside_block(self):
+        with database.get_db_connection() as conn:
+            cursor = database.prepared_cursor(conn, "SELECT n")
+            cursor.execute("SELECT n")
+            self.assertEqual(fetch_single(cursor), {"n": 1})
+            conn.cursor().execute("SELECT 2")
+
+    def test_failed_drain_discards_connection(self):
+        with database.get_db_connection() as conn:
+            cursor = database.prepared_cursor(conn, "SELECT n")
+            cursor.execute("SELECT n")
+            cursor.fail_nextset = True
+        self.assertTrue(conn.closed)
+        self.assertEqual(database._idle.qsize(), 0)
+        self.assertNotIn(id(conn), database._statement_cache)
+
+
+if __name__ == "__main__":
+    unittest.main()